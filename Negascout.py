@@ -1,39 +1,72 @@
 import time
 import random
+from array import array
+
+EXACT, LOWER, UPPER = 0, 1, 2  # 置換表に保存した評価値の種類
 
 class NegascoutNode:
     def __init__(self, state, parent=None):
         self.state = state
         self.parent = parent
-        self.children = []
         self.best_move = None
 
-    def add_child(self, child):
-        self.children.append(child)
-
 class Negascout:
     def __init__(self, depth_limit=5):
         self.depth_limit = depth_limit
+        self.tt = {}  # 置換表: (zhash, color) -> (depth, score, flag, best_move)
 
     def search(self, root_state):
-        root_node = NegascoutNode(root_state)
-        score = self.negascout(root_node, self.depth_limit, -float('inf'), float('inf'), 1)
+        self.tt = {}
+        root_node = NegascoutNode(root_state.clone())  # 探索中は盤面を直接書き換えるのでコピーしておく
+        # 反復深化: 浅い探索で置換表に残った最善手を、次の深さで最初に読む
+        for depth in range(1, self.depth_limit + 1):
+            self.negascout(root_node, depth, -float('inf'), float('inf'), 1)
         return root_node.best_move
 
+    def order_moves(self, moves, tt_move):
+        # 置換表の最善手 → 隅 → 辺 → その他 → X打ち の順に並べる
+        moves.sort(key=_ORDER_KEY, reverse=True)
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+        return moves
+
     def negascout(self, node, depth, alpha, beta, color):
         if depth == 0 or node.state.is_game_over():
             return color * self.evaluate(node.state)
 
+        key = (node.state.zhash, color)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, flag, tt_move = entry
+            if entry_depth >= depth:
+                if flag == EXACT:
+                    node.best_move = tt_move
+                    return entry_score
+                if flag == LOWER:
+                    alpha = max(alpha, entry_score)
+                else:
+                    beta = min(beta, entry_score)
+                if alpha >= beta:
+                    node.best_move = tt_move
+                    return entry_score
+        alpha_orig = alpha
+
         moves = node.state.get_valid_moves()
         if not moves:
-            return -self.negascout(node, depth-1, -beta, -alpha, -color)
+            # パス: 手番だけを相手に渡して読み、戻ったら手番（とハッシュ）を元に戻す
+            node.state.pass_turn()
+            score = -self.negascout(node, depth-1, -beta, -alpha, -color)
+            node.state.pass_turn()
+            return score
+        moves = self.order_moves(moves, tt_move)
 
         score = -float('inf')
         for i, move in enumerate(moves):
-            new_state = node.state.clone()
-            new_state.apply_move(move)
-            child_node = NegascoutNode(new_state, parent=node)
-            node.add_child(child_node)
+            # clone せずに同じ盤面へ手を打ち、読み終えたら undo_move で戻す
+            node.state.apply_move(move)
+            child_node = NegascoutNode(node.state, parent=node)
 
             if i == 0:
                 current_score = -self.negascout(child_node, depth-1, -beta, -alpha, -color)
@@ -41,6 +74,7 @@ class Negascout:
                 current_score = -self.negascout(child_node, depth-1, -alpha-1, -alpha, -color)
                 if alpha < current_score < beta:
                     current_score = -self.negascout(child_node, depth-1, -beta, -current_score, -color)
+            node.state.undo_move()
 
             if current_score > score:
                 score = current_score
@@ -50,11 +84,18 @@ class Negascout:
             if alpha >= beta:
                 break
 
+        if score <= alpha_orig:
+            flag = UPPER
+        elif score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[key] = (depth, score, flag, node.best_move)
         return score
 
     def evaluate(self, state):
         # 簡単な評価関数（自分の駒の数 - 相手の駒の数）
-        return sum(state.board)
+        return state.black.bit_count() - state.white.bit_count()
 
 class NegascoutPlayer:
     def __init__(self, depth_limit=5):
@@ -70,105 +111,203 @@ class NegascoutPlayer:
         self.total_time += (end_time - start_time)  # 合計時間を更新
         return move
 
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_A = 0xFEFEFEFEFEFEFEFE  # y == 0 の列を除く
+NOT_H = 0x7F7F7F7F7F7F7F7F  # y == 7 の列を除く
+DIRECTIONS = (
+    (-9, NOT_H), (-8, FULL), (-7, NOT_A),
+    (-1, NOT_H), (1, NOT_A),
+    (7, NOT_H), (8, FULL), (9, NOT_A),
+)
+
+def _shift(bits, shift, mask):
+    if shift > 0:
+        return (bits << shift) & mask
+    return (bits >> -shift) & mask
+
+def _move_mask(my, opp):
+    empty = ~(my | opp) & FULL
+    moves = 0
+    for shift, mask in DIRECTIONS:
+        x = opp & _shift(my, shift, mask)
+        for _ in range(5):
+            x |= opp & _shift(x, shift, mask)
+        moves |= empty & _shift(x, shift, mask)
+    return moves
+
+def _build_rays():
+    rays = []
+    for square in range(64):
+        x, y = divmod(square, 8)
+        square_rays = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx == 0 and dy == 0:
+                    continue
+                ray = []
+                nx, ny = x + dx, y + dy
+                while 0 <= nx < 8 and 0 <= ny < 8:
+                    ray.append(1 << (nx * 8 + ny))
+                    nx += dx
+                    ny += dy
+                square_rays.append(tuple(ray))
+        rays.append(tuple(square_rays))
+    return tuple(rays)
+
+RAYS = _build_rays()  # RAYS[マス][方向] = その方向に並ぶマスのビット
+
+def _build_square_values():
+    values = []
+    for square in range(64):
+        x, y = divmod(square, 8)
+        if x in (0, 7) and y in (0, 7):
+            values.append(100)  # 隅
+        elif x in (1, 6) and y in (1, 6):
+            values.append(-20)  # X打ち
+        elif x in (0, 7) or y in (0, 7):
+            values.append(10)  # 辺
+        else:
+            values.append(0)
+    return tuple(values)
+
+SQUARE_VALUE = _build_square_values()  # 手の並べ替えに使うマスの静的な価値
+_ORDER_KEY = SQUARE_VALUE.__getitem__
+
+def _build_zobrist():
+    rng = random.Random(0x05E7)  # 再現性のためシードは固定
+    table = tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(64))
+    return table, rng.getrandbits(64)
+
+ZOBRIST, ZOBRIST_STM = _build_zobrist()  # ZOBRIST[マス][0: 黒, 1: 白], ZOBRIST_STM: 白番
+ZOBRIST_FLIP = tuple(black ^ white for black, white in ZOBRIST)
+
+def _flip_mask(my, opp, move):
+    flips = 0
+    for ray in RAYS[move]:
+        flipped = 0
+        for bit in ray:
+            if opp & bit:
+                flipped |= bit
+            else:
+                if my & bit:
+                    flips |= flipped
+                break
+    return flips
+
 class OthelloGame:
     def __init__(self):
-        self.board = self.initialize_board()
+        self.black, self.white = self.initialize_board()
         self.current_player = 1
         self.last_move = None
-        self.turns_passed = 0
+        self.zhash = self.compute_hash()
+        self.history = []  # undo_move 用: (move, flips, 手番, zhash, last_move)
 
     def initialize_board(self):
-        board = [0] * 64
-        board[27], board[36] = -1, -1  # 白
-        board[28], board[35] = 1, 1  # 黒
+        black = 0x0000000810000000  # 28, 35
+        white = 0x0000001008000000  # 27, 36
+        return black, white
+
+    @property
+    def board(self):
+        board = array('b', bytes(64))
+        for bits, color in ((self.black, 1), (self.white, -1)):
+            while bits:
+                lsb = bits & -bits
+                board[lsb.bit_length() - 1] = color
+                bits ^= lsb
         return board
 
+    def compute_hash(self):
+        zhash = ZOBRIST_STM if self.current_player == -1 else 0
+        for i in range(64):
+            if self.black >> i & 1:
+                zhash ^= ZOBRIST[i][0]
+            elif self.white >> i & 1:
+                zhash ^= ZOBRIST[i][1]
+        return zhash
+
+    def _players(self):
+        if self.current_player == 1:
+            return self.black, self.white
+        return self.white, self.black
+
+    def gen_moves(self):
+        return _move_mask(*self._players())
+
     def get_valid_moves(self):
+        mask = self.gen_moves()
         moves = []
-        for i in range(64):
-            if self.is_valid_move(i):
-                moves.append(i)
+        while mask:
+            lsb = mask & -mask
+            moves.append(lsb.bit_length() - 1)
+            mask ^= lsb
         return moves
 
     def is_valid_move(self, index):
-        if self.board[index] != 0:
-            return False
-        x, y = index // 8, index % 8
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
-        for dx, dy in directions:
-            if self.can_flip(x, y, dx, dy):
-                return True
-        return False
-
-    def can_flip(self, x, y, dx, dy):
-        opponent = -self.current_player
-        flipped = False
-        nx, ny = x + dx, y + dy
-        while 0 <= nx < 8 and 0 <= ny < 8:
-            ni = nx * 8 + ny
-            if self.board[ni] == opponent:
-                flipped = True
-            elif self.board[ni] == self.current_player:
-                return flipped
-            else:
-                return False
-            nx += dx
-            ny += dy
-        return False
-
-    def flip_discs(self, move, player):
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]
-        flips = []
-        for direction in directions:
-            flipped = []
-            x, y = divmod(move, 8)
-            dx, dy = direction
-            nx, ny = x + dx, y + dy
-            while 0 <= nx < 8 and 0 <= ny < 8:
-                index = nx * 8 + ny
-                if self.board[index] == 0:
-                    break
-                if self.board[index] == player:
-                    flips.extend(flipped)
-                    break
-                flipped.append(index)
-                nx += dx
-                ny += dy
-        return flips
+        return bool(self.gen_moves() >> index & 1)
 
     def pass_turn(self):
-        self.turns_passed += 1
         self.current_player = -self.current_player
-        print(f"Player {self.current_player} has passed their turn.")
+        self.zhash ^= ZOBRIST_STM
 
     def apply_move(self, move):
         if move is not None and self.is_valid_move(move):
-            self.board[move] = self.current_player
+            my, opp = self._players()
+            move_bit = 1 << move
+            flips = _flip_mask(my, opp, move)
+            self.history.append((move, flips, self.current_player, self.zhash, self.last_move))
+            my |= move_bit | flips
+            opp ^= flips
+            if self.current_player == 1:
+                self.black, self.white = my, opp
+            else:
+                self.white, self.black = my, opp
+            zhash = self.zhash ^ ZOBRIST[move][0 if self.current_player == 1 else 1] ^ ZOBRIST_STM
+            while flips:
+                lsb = flips & -flips
+                zhash ^= ZOBRIST_FLIP[lsb.bit_length() - 1]
+                flips ^= lsb
+            self.zhash = zhash
             self.last_move = move
-            flips = self.flip_discs(move, self.current_player)
-            for flip in flips:
-                self.board[flip] = self.current_player
             self.current_player *= -1
-            self.turns_passed = 0
         else:
             print(f"Invalid move detected: {move}")
 
+    def undo_move(self):
+        move, flips, player, zhash, last_move = self.history.pop()
+        if player == 1:
+            self.black ^= (1 << move) | flips
+            self.white |= flips
+        else:
+            self.white ^= (1 << move) | flips
+            self.black |= flips
+        self.current_player = player
+        self.zhash = zhash
+        self.last_move = last_move
+
     def clone(self):
         new_game = OthelloGame()
-        new_game.board = self.board[:]
+        new_game.black = self.black
+        new_game.white = self.white
         new_game.current_player = self.current_player
+        new_game.zhash = self.zhash
         return new_game
 
+    def has_any_move(self):
+        return self.gen_moves() != 0
+
+    def opponent_has_any_move(self):
+        my, opp = self._players()
+        return _move_mask(opp, my) != 0
+
     def is_game_over(self):
-        if all(cell != 0 for cell in self.board):
-            return not self.get_valid_moves()
-        if self.turns_passed >= 2:
-            return False
-        return not self.get_valid_moves()
+        if (self.black | self.white) == FULL:
+            return True
+        return not self.has_any_move() and not self.opponent_has_any_move()
 
     def get_winner(self):
-        score = sum(self.board)
-        return 1 if score > 0 else -1 if score < 0 else 0
+        black, white = self.black.bit_count(), self.white.bit_count()
+        return 1 if black > white else -1 if white > black else 0
 
     def print_board(self):
         edge = 8
@@ -192,7 +331,7 @@ def main():
     while not game.is_game_over():
         game.print_board()
         while True:
-            if game.turns_passed >= 2:
+            if game.is_game_over():
                 break
             moves = game.get_valid_moves()
             if len(moves) == 0:
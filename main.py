@@ -1,234 +1,661 @@
+import math
+import multiprocessing
 import random
+import threading
 import time
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+try:
+    from numba import njit
+    _U64 = np.uint64
+except ImportError:  # numba が無い環境ではカーネルを純Pythonのまま実行する
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+    _U64 = int
+
+VIRTUAL_LOSS = 1  # 木並列化・バッチ評価で、評価待ちの経路に一時的に加える負けの数
 
 class MCTSNode:
-    def __init__(self, state, parent=None):
+    __slots__ = ('state', 'children', 'child_moves', 'child_wins', 'child_visits', 'child_vloss',
+                 'visits', 'wins', 'vloss', 'untried_moves', 'exploration_weight')
+
+    def __init__(self, state):
         if state is None:
             print("Error: state is None")
         self.state = state  # オセロの盤面状態
-        self.parent = parent  # 親ノード
+        # 転置表で同じ局面のノードを共有するので、木ではなく DAG になる（親は1つとは限らない）
         self.children = []  # 子ノードリスト
+        self.child_moves = []  # 各子へ進む手（共有ノードの state.last_move は別の親からの手のことがある）
         self.visits = 0  # 訪問回数 N
         self.wins = 0  # 勝ち数 W
-        self.untried_moves = state.get_valid_moves()  # 未探索の手
+        self.vloss = 0  # 探索中の仮の負け（visits / wins とは別に数え、終わったら取り消す）
+        self.untried_moves = list(state.get_valid_moves())  # 未探索の手（キャッシュを壊さないようコピー）
+        # pop() で末尾から展開するので、優先度の高い（値の小さい）マスを末尾に並べる
+        self.untried_moves.sort(key=_PRIORITY_KEY, reverse=True)
+        if not self.untried_moves and not state.is_game_over():
+            self.untried_moves.append(None)  # 打てる手が無いときはパスを1手として扱う
+        # 子へ進む辺ごとの勝ち数・訪問回数（子の数だけ先に確保しておき、children と同じ添字で引く）
+        self.child_wins = [0] * len(self.untried_moves)
+        self.child_visits = [0] * len(self.untried_moves)
+        self.child_vloss = [0] * len(self.untried_moves)
         self.exploration_weight = 1.4  # 探索の重み（UCB1の係数）
 
     def is_fully_expanded(self):
         """ すべての手が展開されたか """
         return len(self.untried_moves) == 0
 
-    def best_child(self, exploration_weight=1.4):
-        """ UCB1 に基づいて最良の子を選択 """
-        if not self.children:
-            print("Warning: No children available to select best child.")
-            return None  # あるいは適切なデフォルトノードを返す
-
-        return max(self.children, key=lambda child: child.get_value(exploration_weight))
-
-    def expand(self):
-        """ 未探索の手からランダムに1つ選び、新しいノードを作る """
-        if not self.untried_moves:
-            return self  # すでに全ての手を試した場合
+    def best_child_index(self, exploration_weight=1.4):
+        """ UCB1 が最大の子の位置（children / child_* 配列の添字）を返す
+        子は高々十数個なので、NumPy で配列演算するより Python のループのほうが速い """
+        explore = exploration_weight * math.sqrt(self.visits + self.vloss)
+        best_index, best_score = 0, -math.inf
+        for i in range(len(self.children)):
+            vloss = self.child_vloss[i]  # 仮の負けは選択のときだけ足し込む
+            visits = self.child_visits[i] + vloss
+            if visits == 0:
+                return i  # 未訪問ノードには無限大の価値を与える
+            score = (self.child_wins[i] - vloss) / visits + explore / (1 + visits)  # 勝率 + 探索重み
+            if score > best_score:
+                best_index, best_score = i, score
+        return best_index
+
+    def expand(self, table=None):
+        """ 未探索の手を1つ展開し、その子ノードを返す（子は children の末尾に入る）
+        table（ハッシュ → ノード）を渡すと、別の手順で到達済みの局面は既存のノードを共有する """
         move = self.untried_moves.pop()
         new_state = self.state.clone()  # 盤面をコピー
-        new_state.apply_move(move)  # 手を適用
+        if move is None:
+            new_state.pass_turn()  # パス
+        else:
+            new_state.apply_move(move)  # 手を適用
         
-        child_node = MCTSNode(new_state, parent=self)
+        child_node = table.get(new_state.zhash) if table is not None else None
+        if child_node is None:
+            child_node = MCTSNode(new_state)
+            if table is not None:
+                table[new_state.zhash] = child_node
+        # 転置: 既存ノードなら訪問回数・勝ち数をそのまま共有する（この親からの辺の統計は 0 から数える）
         self.children.append(child_node)  # 子ノードを追加
-
+        self.child_moves.append(move)
         return child_node
 
-    def backpropagate(self, result):
-        """ シミュレーション結果を親ノードへ反映 """
-        self.visits += 1
-        self.wins += result
-        if self.parent:
-            self.parent.backpropagate(-result)  # 相手の視点で評価
-    
-    def get_value(self, exploration_weight):
-        """UCB1値を計算"""
-        if self.visits == 0:
-            return float('inf')  # 未訪問ノードには無限大の価値を与える
-        exploitation = self.wins / self.visits  # 実際の成果（勝率）
-        exploration = exploration_weight * (self.parent.visits ** 0.5) / (1 + self.visits)  # 探索重み
-        return exploitation + exploration
-
 class MCTS:
-    def __init__(self, iteration_limit=10000, time_limit=None, exploration_weight=1.4):
+    def __init__(self, iteration_limit=10000, time_limit=None, exploration_weight=1.4, leaf_rollouts=1, batch_size=1,
+                 num_threads=1):
+        if num_threads > 1 and (leaf_rollouts > 1 or batch_size > 1):
+            # 木並列化のワーカーは1反復ごとに simulate を1回だけ呼ぶので、両者は組み合わせられない
+            raise ValueError("num_threads > 1 cannot be combined with leaf_rollouts > 1 or batch_size > 1")
         self.iteration_limit = iteration_limit  # シミュレーション回数
         self.time_limit = time_limit  # 時間制限
         self.exploration_weight = exploration_weight  # UCB1の探索パラメータ
+        self.leaf_rollouts = leaf_rollouts  # 葉並列化: 1つの葉で同時に回すプレイアウト数
+        # 2以上なら、その数の葉を集めて batched_playout でまとめて評価する。CPU では K を数百にしても
+        # JIT 版の playout を1局ずつ回すほうが速い（配列演算を GPU に載せるときのための経路）ので既定は 1
+        self.batch_size = batch_size
+        self.num_threads = num_threads  # 2以上なら木並列化（複数スレッドで同じ木を育てる）
 
     def search(self, root_state):
         """ MCTSで最良の手を探索 """
+        root_node = self.build_tree(root_state)
+        return root_node.child_moves[root_node.best_child_index(exploration_weight=0)]  # 最良の手を返す
+
+    def root_visits(self, root_state):
+        """ 探索して根の各手の訪問回数を {手: 訪問回数} で返す """
+        root_node = self.build_tree(root_state)
+        return {move: int(visits) for move, visits in zip(root_node.child_moves, root_node.child_visits)}
+
+    def build_tree(self, root_state):
+        """ 制限に達するまで探索木を育て、根ノードを返す """
         root_node = MCTSNode(root_state)
+        table = {root_state.zhash: root_node}  # 転置表（Zobrist ハッシュ → ノード）
         start_time = time.time()
 
-        for _ in range(self.iteration_limit):
+        if self.num_threads > 1:
+            lock = threading.Lock()
+            iterations = max(1, self.iteration_limit // self.num_threads)
+            threads = [threading.Thread(target=self.tree_worker, args=(root_node, table, lock, iterations, start_time))
+                       for _ in range(self.num_threads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return root_node
+
+        rollouts = self.leaf_rollouts
+        # playout は GIL を解放するので、スレッドで同時に回せる（木の操作はこのスレッドだけで行う）
+        executor = None
+        if rollouts > 1 and self.batch_size == 1:
+            executor = ThreadPoolExecutor(max_workers=rollouts)
+
+        try:
+            for _ in range(max(1, self.iteration_limit // (rollouts * self.batch_size))):
+                if self.time_limit and (time.time() - start_time) > self.time_limit:
+                    break
+
+                paths = []
+                for _ in range(self.batch_size):
+                    path = self.select_and_expand(root_node, table)  # 1. 選択 2. 展開
+                    if self.batch_size > 1:
+                        self.add_virtual_loss(path, VIRTUAL_LOSS)  # 同じバッチで同じ葉ばかり選ばないようにする
+                    paths.append(path)
+                results = self.evaluate_leaves([path[-1][0] for path in paths], executor)  # 3. シミュレーション
+                for path, result in zip(paths, results):
+                    if self.batch_size > 1:
+                        self.add_virtual_loss(path, -VIRTUAL_LOSS)
+                    self.backpropagate(path, result, rollouts)  # 4. 逆伝播
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return root_node
+
+    def tree_worker(self, root_node, table, lock, iterations, start_time):
+        """ 木並列化の1スレッド分: 木の操作はロック内、プレイアウトはロックの外（GIL も解放される）で行う """
+        for _ in range(iterations):
             if self.time_limit and (time.time() - start_time) > self.time_limit:
                 break
-            
-            node = self.select_node(root_node)  # 1. 選択
-            if not node.state.is_game_over():
-                node = node.expand()  # 2. 展開
-            result = self.simulate(node.state)  # 3. シミュレーション
-            node.backpropagate(result)  # 4. 逆伝播
-
-        return root_node.best_child(exploration_weight=0).state.last_move  # 最良の手を返す
 
-    def select_node(self, node):
-        """ UCB1 を使ってノードを選択 """
+            with lock:
+                path = self.select_and_expand(root_node, table)  # 1. 選択 2. 展開
+                self.add_virtual_loss(path, VIRTUAL_LOSS)  # 他のスレッドが同じ経路を選びにくくする
+            node = path[-1][0]
+            if node.state.is_game_over():
+                result = node.state.get_winner()
+            else:
+                result = self.simulate(node.state)  # 3. シミュレーション
+            with lock:
+                self.add_virtual_loss(path, -VIRTUAL_LOSS)
+                self.backpropagate(path, result)  # 4. 逆伝播
+
+    def evaluate_leaves(self, leaves, executor=None):
+        """ 葉ごとに leaf_rollouts 回分のプレイアウト結果の合計を返す """
+        rollouts = self.leaf_rollouts
+        results = [0] * len(leaves)
+        pending = []  # プレイアウトが必要な葉の位置
+        for i, node in enumerate(leaves):
+            if node.state.is_game_over():
+                results[i] = node.state.get_winner() * rollouts  # 終局ならプレイアウトせずに結果が決まる
+            else:
+                pending.append(i)
+        if not pending:
+            return results
+
+        if self.batch_size > 1:
+            states = [leaves[i].state for i in pending for _ in range(rollouts)]
+            winners = batched_playout([state.black for state in states],
+                                      [state.white for state in states],
+                                      [state.current_player for state in states])
+            for i, total in zip(pending, winners.reshape(len(pending), rollouts).sum(axis=1)):
+                results[i] = int(total)
+        elif executor is not None:
+            for i in pending:
+                futures = [executor.submit(self.simulate, leaves[i].state) for _ in range(rollouts)]
+                results[i] = sum(future.result() for future in futures)
+        else:
+            for i in pending:
+                results[i] = self.simulate(leaves[i].state)
+        return results
+
+    def select_and_expand(self, root_node, table):
+        """ UCB1 で葉まで降り、終局でなければ1手展開して、その経路を返す
+        経路は (ノード, 親の children における位置) のリストで、根の位置は None """
+        path = [(root_node, None)]
+        node = root_node
         while not node.state.is_game_over() and node.is_fully_expanded():
-            node = node.best_child(self.exploration_weight)
-        # if node.children == []:
-        #     print("No children found during selection.")
-        return node
+            index = node.best_child_index(self.exploration_weight)
+            node = node.children[index]
+            path.append((node, index))
+        if not node.state.is_game_over():
+            path.append((node.expand(table), len(node.children) - 1))
+        return path
+
+    def backpropagate(self, path, result, count=1):
+        """ シミュレーション結果を経路に沿って葉から根へ反映する
+        ノードは複数の親に共有されるので、親ポインタではなく選択した経路を辿る。
+        count 回分のプレイアウトの合計を result としてまとめて反映できる """
+        for i in range(len(path) - 1, -1, -1):
+            node, index = path[i]
+            node.visits += count
+            node.wins += result
+            if index is not None:  # 親が持つ、この辺の統計配列も更新する
+                parent = path[i - 1][0]
+                parent.child_visits[index] += count
+                parent.child_wins[index] += result
+            result = -result  # 相手の視点で評価
+
+    def add_virtual_loss(self, path, loss):
+        """ 経路上の各辺に仮の負けを加える（負の値を渡すと取り消す）
+        visits / wins 本体には触れず vloss / child_vloss に数えるので、取り消し前に他の処理から
+        読まれても仮の負けが統計に残ることはない """
+        for i in range(len(path) - 1, -1, -1):
+            node, index = path[i]
+            node.vloss += loss
+            if index is not None:
+                path[i - 1][0].child_vloss[index] += loss
 
     def simulate(self, state):
-        """ ランダムにプレイアウトして勝敗を返す """
-        current_state = state.clone()
-        while not current_state.is_game_over():
-            moves = current_state.get_valid_moves()
-            if moves:
-                move = random.choice(moves)
-                current_state.apply_move(move)
-        return current_state.get_winner()  # 勝者を返す
+        """ ランダムにプレイアウトして勝敗を返す（JIT 済みの playout に任せる） """
+        return playout(_U64(state.black), _U64(state.white), state.current_player)
     
+def _run_mcts(args):
+    """ ワーカープロセスで独立した木を探索し、根の訪問回数を返す（Pool.map 用） """
+    state, iteration_limit, time_limit, exploration_weight, seed = args
+    random.seed(seed)
+    seed_playout(seed)  # fork 直後は乱数状態が親と同じなのでずらす
+    return MCTS(iteration_limit, time_limit, exploration_weight).root_visits(state)
+
 class MCTSPlayer:
-    def __init__(self, iteration_limit=100000, time_limit=None):
+    def __init__(self, iteration_limit=100000, time_limit=None, num_workers=1):
         self.mcts = MCTS(iteration_limit, time_limit)
         self.total_time = 0  # AIが考えた合計時間を保持
+        self.num_workers = num_workers  # 2以上ならルート並列化（プロセスごとに独立した木）
+        self.pool = None  # ターンをまたいで使い回すプロセスプール
 
     def get_move(self, game_state):
         """ MCTSで最良の手を決定 """
         if not game_state.get_valid_moves():
             return None  # パス
         start_time = time.time()
-        move = self.mcts.search(game_state)
+        if self.num_workers > 1:
+            move = self.parallel_search(game_state)
+        else:
+            move = self.mcts.search(game_state)
         end_time = time.time()
         self.total_time += (end_time - start_time)  # 合計時間を更新
         return move
 
+    def parallel_search(self, game_state):
+        """ ルート並列化: 各ワーカーの根の訪問回数を合算し、最も訪問された手を選ぶ """
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.num_workers)
+        iterations = max(1, self.mcts.iteration_limit // self.num_workers)
+        args = [(game_state, iterations, self.mcts.time_limit, self.mcts.exploration_weight, random.getrandbits(32))
+                for _ in range(self.num_workers)]
+        total_visits = {}
+        for visits in self.pool.map(_run_mcts, args):
+            for move, count in visits.items():
+                total_visits[move] = total_visits.get(move, 0) + count
+        return max(total_visits, key=total_visits.get)
+
+    def close(self):
+        """ プロセスプールを終了する """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+# ビットボード用の定数（インデックス i = x * 8 + y がビット i に対応）
+FULL = 0xFFFFFFFFFFFFFFFF
+NOT_A = 0xFEFEFEFEFEFEFEFE  # 左端の列 (y == 0) を除くマスク
+NOT_H = 0x7F7F7F7F7F7F7F7F  # 右端の列 (y == 7) を除くマスク
+# 8方向の (シフト量, シフト後に掛けるマスク)
+DIRECTIONS = (
+    (-9, NOT_H), (-8, FULL), (-7, NOT_A),
+    (-1, NOT_H), (1, NOT_A),
+    (7, NOT_H), (8, FULL), (9, NOT_A),
+)
+
+def _shift(bits, shift, mask):
+    """ ビットボードを1マス分シフトし、盤外に出たビットを落とす """
+    if shift > 0:
+        return (bits << shift) & mask
+    return (bits >> -shift) & mask
+
+def _move_mask(my, opp):
+    """ 合法手をビットボードで返す（Dumb7Fill） """
+    empty = ~(my | opp) & FULL
+    moves = 0
+    for shift, mask in DIRECTIONS:
+        x = opp & _shift(my, shift, mask)
+        for _ in range(5):
+            x |= opp & _shift(x, shift, mask)
+        moves |= empty & _shift(x, shift, mask)
+    return moves
+
+def _build_rays():
+    """ マスごと・方向ごとに、盤端まで並ぶマスのビットを近い順にまとめた表を作る """
+    rays = []
+    for square in range(64):
+        x, y = divmod(square, 8)
+        square_rays = []
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                if dx == 0 and dy == 0:
+                    continue
+                ray = []
+                nx, ny = x + dx, y + dy
+                while 0 <= nx < 8 and 0 <= ny < 8:
+                    ray.append(1 << (nx * 8 + ny))
+                    nx += dx
+                    ny += dy
+                square_rays.append(tuple(ray))
+        rays.append(tuple(square_rays))
+    return tuple(rays)
+
+RAYS = _build_rays()  # RAYS[マス][方向] = その方向に並ぶマスのビット
+
+def _build_zobrist():
+    """ Zobrist ハッシュ用の乱数表を作る（再現性のためシードは固定） """
+    rng = random.Random(0x05E7)
+    table = tuple((rng.getrandbits(64), rng.getrandbits(64)) for _ in range(64))
+    return table, rng.getrandbits(64)
+
+ZOBRIST, ZOBRIST_STM = _build_zobrist()  # ZOBRIST[マス][0: 黒, 1: 白], ZOBRIST_STM: 白番のとき XOR する値
+ZOBRIST_FLIP = tuple(black ^ white for black, white in ZOBRIST)  # 石が裏返ったときに XOR する値
+
+def _build_square_priority():
+    """ 展開順に使うマスの優先度を作る（小さいほど先に展開する） """
+    priority = []
+    for square in range(64):
+        x, y = divmod(square, 8)
+        near_x, near_y = min(x, 7 - x), min(y, 7 - y)  # 最寄りの盤端までの距離
+        if near_x == 0 and near_y == 0:
+            priority.append(0)  # 隅
+        elif near_x <= 1 and near_y <= 1:
+            priority.append(3)  # C打ち・X打ち（隅の隣）
+        elif near_x == 0 or near_y == 0:
+            priority.append(1)  # 辺
+        else:
+            priority.append(2)  # 内側
+    return tuple(priority)
+
+SQUARE_PRIORITY = _build_square_priority()
+_PRIORITY_KEY = SQUARE_PRIORITY.__getitem__  # untried_moves の並べ替えキー（呼び出しごとに作らない）
+
+def _flip_mask(my, opp, move):
+    """ move に打ったときにひっくり返る石をビットボードで返す """
+    flips = 0
+    for ray in RAYS[move]:
+        flipped = 0
+        for bit in ray:
+            if opp & bit:
+                flipped |= bit  # 相手の石なら挟み続ける
+            else:
+                if my & bit:
+                    flips |= flipped  # 自分の石で挟めた
+                break
+    return flips
+
+# ---- プレイアウト用の JIT カーネル（uint64 の black/white と手番 player を直接扱う） ----
+_ZERO = _U64(0)
+_ONE = _U64(1)
+_FULL = _U64(FULL)
+_JIT_DIRECTIONS = tuple((shift, _U64(mask)) for shift, mask in DIRECTIONS)
+
+@njit(cache=True)
+def _jit_shift(bits, shift, mask):
+    if shift > 0:
+        return (bits << shift) & mask
+    return (bits >> -shift) & mask
+
+@njit(cache=True)
+def _popcount(bits):
+    count = 0
+    while bits:
+        bits &= bits - _ONE
+        count += 1
+    return count
+
+@njit(cache=True)
+def gen_moves(black, white, player):
+    """ player の合法手をビットボードで返す """
+    if player == 1:
+        my, opp = black, white
+    else:
+        my, opp = white, black
+    empty = ~(my | opp) & _FULL
+    moves = _ZERO
+    for shift, mask in _JIT_DIRECTIONS:
+        x = opp & _jit_shift(my, shift, mask)
+        for _ in range(5):
+            x |= opp & _jit_shift(x, shift, mask)
+        moves |= empty & _jit_shift(x, shift, mask)
+    return moves
+
+@njit(cache=True)
+def apply(black, white, move_bit, player):
+    """ player が move_bit に打った後の (black, white) を返す """
+    if player == 1:
+        my, opp = black, white
+    else:
+        my, opp = white, black
+    flips = _ZERO
+    for shift, mask in _JIT_DIRECTIONS:
+        t = opp & _jit_shift(move_bit, shift, mask)
+        for _ in range(5):
+            t |= opp & _jit_shift(t, shift, mask)
+        if my & _jit_shift(t, shift, mask):
+            flips |= t
+    my |= move_bit | flips
+    opp ^= flips
+    if player == 1:
+        return my, opp
+    return opp, my
+
+@njit(cache=True)
+def _random_bit(moves):
+    """ moves の立っているビットから1つをランダムに選ぶ """
+    k = random.randrange(_popcount(moves))
+    for _ in range(k):
+        moves &= moves - _ONE  # 最下位ビットを落とす
+    return moves & (~moves + _ONE)
+
+@njit(cache=True)
+def seed_playout(seed):
+    """ playout が使う乱数の種を設定する（JIT 側の乱数は Python の random とは別） """
+    random.seed(seed)
+
+@njit(cache=True, nogil=True)
+def playout(black, white, player):
+    """ 終局までランダムに打ち、勝者（1: 黒, -1: 白, 0: 引き分け）を返す
+    black, white は _U64 で渡すこと（Python の int だと 2**63 以上で変換に失敗する） """
+    b = _U64(black)
+    w = _U64(white)
+    passes = 0
+    while passes < 2:  # 両者が続けてパスしたら終局
+        moves = gen_moves(b, w, player)
+        if moves == _ZERO:
+            passes += 1
+        else:
+            passes = 0
+            b, w = apply(b, w, _random_bit(moves), player)
+        player = -player
+    score = _popcount(b) - _popcount(w)
+    return 1 if score > 0 else -1 if score < 0 else 0
+
+# ---- NumPy による一括プレイアウト（K 局分の盤面を uint64 配列としてまとめて進める） ----
+_NP_ONE = np.uint64(1)
+_NP_DIRECTIONS = tuple((np.uint64(abs(shift)), shift > 0, np.uint64(mask)) for shift, mask in DIRECTIONS)
+
+def _np_shift(bits, shift, left, mask):
+    """ 配列の各ビットボードを1マス分シフトし、盤外に出たビットを落とす """
+    return ((bits << shift) if left else (bits >> shift)) & mask
+
+def batched_playout(black, white, player, rng=None):
+    """ K 局分のランダムプレイアウトを配列演算でまとめて行い、勝者（1, -1, 0）の配列を返す
+    1手ごとに NumPy の呼び出しが何度も入るので、CPU では JIT 版 playout の逐次実行より遅い
+    （4096 回で K=8 は数十倍、K=512 でも 2 倍以上かかる）。同じ配列演算を GPU（CuPy など）で回すときのための実装 """
+    rng = np.random.default_rng() if rng is None else rng
+    black = np.array(black, dtype=np.uint64)
+    white = np.array(white, dtype=np.uint64)
+    player = np.array(player, dtype=np.int8)
+    passes = np.zeros(len(black), dtype=np.int8)  # 連続パス数（2 になった盤面は終局）
+
+    while True:
+        active = passes < 2
+        if not active.any():
+            break
+        is_black = player == 1
+        my = np.where(is_black, black, white)
+        opp = np.where(is_black, white, black)
+
+        # 全盤面の合法手を Dumb7Fill でまとめて求める
+        empty = ~(my | opp)
+        moves = np.zeros_like(my)
+        for shift, left, mask in _NP_DIRECTIONS:
+            x = opp & _np_shift(my, shift, left, mask)
+            for _ in range(5):
+                x |= opp & _np_shift(x, shift, left, mask)
+            moves |= empty & _np_shift(x, shift, left, mask)
+        moves[~active] = 0
+        has_move = moves != 0
+        passes = np.where(has_move, 0, np.minimum(passes + 1, 2)).astype(np.int8)
+
+        # 各盤面で立っているビットから1つをランダムに選ぶ（下位ビットを k 個落とす）
+        k = (rng.random(len(moves)) * np.bitwise_count(moves)).astype(np.int64)
+        for j in range(int(k.max())):
+            drop = k > j
+            moves[drop] &= moves[drop] - _NP_ONE
+        move_bit = moves & (~moves + _NP_ONE)  # 打てない盤面では 0 になり、盤面は変わらない
+
+        flips = np.zeros_like(my)
+        for shift, left, mask in _NP_DIRECTIONS:
+            t = opp & _np_shift(move_bit, shift, left, mask)
+            for _ in range(5):
+                t |= opp & _np_shift(t, shift, left, mask)
+            flips |= np.where((my & _np_shift(t, shift, left, mask)) != 0, t, 0)
+        my |= move_bit | flips
+        opp ^= flips
+        black = np.where(is_black, my, opp)
+        white = np.where(is_black, opp, my)
+        player = -player
+
+    score = np.bitwise_count(black).astype(np.int8) - np.bitwise_count(white).astype(np.int8)
+    return np.sign(score)
+
 class OthelloGame:
     def __init__(self):
-        self.board = self.initialize_board()  # 1次元リスト
+        self.black, self.white = self.initialize_board()  # 64bitのビットボード
         self.current_player = 1  # 1: 黒, -1: 白
         self.last_move = None  # 最後の手を保持する属性を追加
-        self.turns_passed = 0  # パスしたターン数
+        self._cached_moves = None  # 合法手のキャッシュ（盤面が変わるたびに破棄）
+        self.zhash = self.compute_hash()  # 局面の Zobrist ハッシュ（手を打つたびに差分更新）
 
     def initialize_board(self):
-        """ 1次元リストで初期盤面を作成 """
-        board = [0] * 64
-        board[27], board[36] = -1, -1  # 白
-        board[28], board[35] = 1, 1  # 黒
+        """ ビットボードで初期盤面を作成 """
+        black = 0x0000000810000000  # 28, 35
+        white = 0x0000001008000000  # 27, 36
+        return black, white
+
+    @property
+    def board(self):
+        """ 1次元の盤面（表示用）。list ではなく 64 バイトの array('b') で返す """
+        board = array('b', bytes(64))
+        for bits, color in ((self.black, 1), (self.white, -1)):
+            while bits:
+                lsb = bits & -bits
+                board[lsb.bit_length() - 1] = color
+                bits ^= lsb
         return board
 
+    def compute_hash(self):
+        """ 盤面と手番から Zobrist ハッシュを一から計算する """
+        zhash = ZOBRIST_STM if self.current_player == -1 else 0
+        for i in range(64):
+            if self.black >> i & 1:
+                zhash ^= ZOBRIST[i][0]
+            elif self.white >> i & 1:
+                zhash ^= ZOBRIST[i][1]
+        return zhash
+
+    def _players(self):
+        """ (手番側の石, 相手の石) を返す """
+        if self.current_player == 1:
+            return self.black, self.white
+        return self.white, self.black
+
+    def gen_moves(self):
+        """ 現在のプレイヤーの合法手をビットボードで返す（リストを作らない） """
+        return _move_mask(*self._players())
+
     def get_valid_moves(self):
-        """ 現在のプレイヤーの合法手をリストで返す（インデックス形式）"""
+        """ 現在のプレイヤーの合法手をリストで返す（gen_moves をインデックスに展開したもの）
+        結果はキャッシュされるので、呼び出し側で変更しないこと """
+        if self._cached_moves is not None:
+            return self._cached_moves
+        mask = self.gen_moves()
         moves = []
-        for i in range(64):
-            if self.is_valid_move(i):
-                moves.append(i)
+        while mask:
+            lsb = mask & -mask
+            moves.append(lsb.bit_length() - 1)
+            mask ^= lsb
+        self._cached_moves = moves
         return moves
 
     def is_valid_move(self, index):
-        """ 指定のインデックスの手が合法かを判定（ここにオセロのルールを追加） """
-        if self.board[index] != 0:
-            return False  # 仮実装（本当は判定ロジックを書く）
-        
-        x, y=index // 8, index % 8
-        directions = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]  # 8方向
-        for dx, dy in directions:
-            if self.can_flip(x, y, dx, dy):
-                return True  # どこか1方向でも挟めるならOK
-        return False  # どの方向にも挟めないなら不正な手
-    
-    def can_flip(self, x, y, dx, dy):
-        """ (x, y) から (dx, dy) 方向に石を挟めるかチェック """
-        opponent = -self.current_player  # 相手の色
-        flipped = False
-        nx, ny = x + dx, y + dy
-
-        while 0 <= nx < 8 and 0 <= ny < 8:
-            ni = nx * 8 + ny  # 2次元 → 1次元変換
-
-            if self.board[ni] == opponent:
-                flipped = True  # 相手の石を見つけたら継続
-            elif self.board[ni] == self.current_player:
-                return flipped  # 自分の石が見つかったら、挟めていればOK
-            else:
-                return False  # 空白ならダメ
-
-            nx += dx
-            ny += dy
-
-        return False  # 盤外まで進んだらダメ
-    
-    def flip_discs(self, move, player):
-        """指定した位置で相手の駒をひっくり返す"""
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)]  # 8方向
-        flips = []  # ひっくり返す駒を保存
-
-        for direction in directions:
-            flipped = []  # 1方向におけるひっくり返される駒を一時的に保存
-            x, y = divmod(move, 8)  # 1Dインデックスを2D座標に変換
-
-            dx, dy = direction
-            nx, ny = x + dx, y + dy
+        """ 指定のインデックスの手が合法かを判定（キャッシュがあればそれを使い、リストは作らない） """
+        if self._cached_moves is not None:
+            return index in self._cached_moves
+        return bool(self.gen_moves() >> index & 1)
 
-            while 0 <= nx < 8 and 0 <= ny < 8:  # 盤面の範囲内
-                index = nx * 8 + ny  # 1Dインデックスに変換
-                if self.board[index] == 0:  # 空きスペースの場合、ひっくり返せない
-                    break
-                if self.board[index] == player:  # 自分の色の駒が来た場合、ひっくり返しリストに追加
-                    flips.extend(flipped)
-                    break
-                flipped.append(index)  # 相手の色の駒を挟んでいく
-
-                # 次の位置に進む
-                nx += dx
-                ny += dy
-
-        return flips  # ひっくり返す駒のリスト
-    
     def pass_turn(self):
-        """プレイヤーが手を打てない場合にターンをスキップ"""
-        self.turns_passed += 1
+        """プレイヤーが手を打てない場合にターンをスキップ（盤面はそのままで手番だけを交代する）"""
         self.current_player = -self.current_player  # プレイヤー交代
-        print(f"Player {self.current_player} has passed their turn.")
+        self._cached_moves = None
+        self.zhash ^= ZOBRIST_STM
 
     def apply_move(self, move):
         """ 指定の手を適用し、盤面を更新する """
         if move is not None and self.is_valid_move(move):
-            self.board[move] = self.current_player
+            my, opp = self._players()
+            move_bit = 1 << move
+            flips = _flip_mask(my, opp, move)
+            my |= move_bit | flips
+            opp ^= flips
+            if self.current_player == 1:
+                self.black, self.white = my, opp
+            else:
+                self.white, self.black = my, opp
+            zhash = self.zhash ^ ZOBRIST[move][0 if self.current_player == 1 else 1] ^ ZOBRIST_STM
+            while flips:
+                lsb = flips & -flips
+                zhash ^= ZOBRIST_FLIP[lsb.bit_length() - 1]
+                flips ^= lsb
+            self.zhash = zhash
             self.last_move = move  # 最後に行われた手を更新
-            flips = self.flip_discs(move, self.current_player)
-            # ひっくり返す
-            for flip in flips:
-                self.board[flip] = self.current_player
             self.current_player *= -1  # 手番を交代
-            self.turns_passed = 0
+            self._cached_moves = None
         else:
             print(f"Invalid move detected: {move}")  # デバッグ用
 
     def clone(self):
         """ 盤面のコピーを作成（MCTSのため） """
         new_game = OthelloGame()
-        new_game.board = self.board[:]  # 1次元リストのコピー
+        new_game.black = self.black  # int のコピーだけで済む
+        new_game.white = self.white
         new_game.current_player = self.current_player
+        new_game.zhash = self.zhash
+        new_game._cached_moves = self._cached_moves  # 同じ盤面なので合法手も使い回せる
         return new_game
 
+    def has_any_move(self):
+        """ 現在のプレイヤーに打てる手があるか（リストは作らない） """
+        if self._cached_moves is not None:
+            return bool(self._cached_moves)
+        return self.gen_moves() != 0
+
+    def opponent_has_any_move(self):
+        """ 相手に打てる手があるか """
+        my, opp = self._players()
+        return _move_mask(opp, my) != 0
+
     def is_game_over(self):
-        """ ゲームが終了したかを判定 """
-        if all(cell != 0 for cell in self.board):
-            return not self.get_valid_moves()
-        if self.turns_passed >= 2:return False
-        return not self.get_valid_moves()
+        """ ゲームが終了したかを判定（両者とも打てる手がなければ終局） """
+        if (self.black | self.white) == FULL:
+            return True  # 盤面が埋まっていれば合法手を調べるまでもない
+        if self.has_any_move():
+            return False
+        return not self.opponent_has_any_move()
 
     def get_winner(self):
         """ 勝者を判定 """
-        score = sum(self.board)
-        return 1 if score > 0 else -1 if score < 0 else 0
+        black, white = self.black.bit_count(), self.white.bit_count()
+        return 1 if black > white else -1 if white > black else 0
     
     def print_board(self):
         edge = 8
@@ -245,6 +672,12 @@ class OthelloGame:
                     temp.append("+")
             print(" ".join(temp))
 
+try:
+    # Cython 版（cythonize -i othello_core.pyx でビルド）があれば、同じ API のそちらを使う
+    from othello_core import OthelloGame
+except ImportError:
+    pass
+
 def get_move_input():
     while True:
         try:
@@ -256,6 +689,37 @@ def get_move_input():
         except ValueError:
             print("入力エラー: 2つの整数をスペースで区切って入力してください。")
 
+def play_one_game(seed):
+    """ AI vs ランダムプレイヤーを1局行い、(勝者, AIが考えた合計時間) を返す（Pool.map 用） """
+    random.seed(seed)  # 再現性のため、ゲームごとに乱数の種を固定する
+    seed_playout(seed)
+
+    # ゲームのセットアップ
+    game = OthelloGame()
+    ai_player = MCTSPlayer(iteration_limit=1000)
+
+    # AI vs ランダムプレイヤーの対戦
+    while not game.is_game_over():
+        while True:
+            if game.is_game_over():
+                break
+            moves = game.get_valid_moves()
+            if len(moves) == 0:
+                game.pass_turn()
+                continue
+            if game.current_player == 1:  # ランダムプレイヤー（黒）
+                move = random.choice(moves)
+            else:  # AIプレイヤー（白）
+                move = ai_player.get_move(game)
+                if move is None:
+                    game.pass_turn()
+                    continue
+            if move in moves:
+                game.apply_move(move)
+                break
+
+    return game.get_winner(), ai_player.total_time
+
 #メイン関数
 def main():
     num_games = 50  # 対戦回数
@@ -264,41 +728,19 @@ def main():
     draws = 0
     total_ai_time = 0
 
-    for _ in range(num_games):
-        # ゲームのセットアップ
-        game = OthelloGame()
-        ai_player = MCTSPlayer(iteration_limit=1000)
-
-        # AI vs ランダムプレイヤーの対戦
-        while not game.is_game_over():
-            while True:
-                if game.turns_passed >= 2:
-                    break
-                moves = game.get_valid_moves()
-                if len(moves) == 0:
-                    game.pass_turn()
-                    continue
-                if game.current_player == 1:  # ランダムプレイヤー（黒）
-                    move = random.choice(moves)
-                else:  # AIプレイヤー（白）
-                    move = ai_player.get_move(game)
-                    if move is None:
-                        game.pass_turn()
-                        continue
-                if move in moves:
-                    game.apply_move(move)
-                    break
+    # 各ゲームは独立しているので、プロセスごとに並列で対戦させる
+    with multiprocessing.Pool() as pool:
+        results = pool.map(play_one_game, range(num_games))
 
-        # 結果を集計
-        winner = game.get_winner()
+    # 結果を集計
+    for winner, ai_time in results:
         if winner == 1:
             random_wins += 1
         elif winner == -1:
             ai_wins += 1
         else:
             draws += 1
-
-        total_ai_time += ai_player.total_time
+        total_ai_time += ai_time
 
     # 勝率を表示
     print(f"AIの勝ち: {ai_wins}回 ({ai_wins / num_games * 100:.2f}%)")
@@ -0,0 +1,252 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+""" main.py の OthelloGame を Cython で書き直したビットボード実装
+
+ビルド: cythonize -i othello_core.pyx
+ビルド済みのモジュールがあれば main.py はこちらの OthelloGame を使う。
+API（属性名・メソッド名・Zobrist ハッシュの値）は main.py の Python 版と同じ。
+"""
+import random
+from array import array
+
+from libc.stdint cimport uint64_t
+
+cdef uint64_t FULL = 0xFFFFFFFFFFFFFFFFULL
+cdef uint64_t NOT_A = 0xFEFEFEFEFEFEFEFEULL  # 左端の列 (y == 0) を除くマスク
+cdef uint64_t NOT_H = 0x7F7F7F7F7F7F7F7FULL  # 右端の列 (y == 7) を除くマスク
+
+# 8方向の (シフト量, シフト後に掛けるマスク)。並びは main.py の DIRECTIONS と同じ
+cdef int SHIFTS[8]
+cdef uint64_t MASKS[8]
+SHIFTS[:] = [-9, -8, -7, -1, 1, 7, 8, 9]
+MASKS[:] = [NOT_H, FULL, NOT_A, NOT_H, NOT_A, NOT_H, FULL, NOT_A]
+
+# Zobrist ハッシュ用の乱数表（main.py の _build_zobrist と同じシード・同じ順序で作る）
+cdef uint64_t ZOBRIST[64][2]
+cdef uint64_t ZOBRIST_FLIP[64]
+cdef uint64_t ZOBRIST_STM
+
+def _build_zobrist():
+    global ZOBRIST_STM
+    cdef int i
+    rng = random.Random(0x05E7)
+    for i in range(64):
+        ZOBRIST[i][0] = rng.getrandbits(64)
+        ZOBRIST[i][1] = rng.getrandbits(64)
+        ZOBRIST_FLIP[i] = ZOBRIST[i][0] ^ ZOBRIST[i][1]
+    ZOBRIST_STM = rng.getrandbits(64)
+
+_build_zobrist()
+
+cdef inline uint64_t _shift(uint64_t bits, int shift, uint64_t mask) nogil:
+    """ ビットボードを1マス分シフトし、盤外に出たビットを落とす """
+    if shift > 0:
+        return (bits << shift) & mask
+    return (bits >> -shift) & mask
+
+cdef inline int _popcount(uint64_t bits) nogil:
+    bits = bits - ((bits >> 1) & 0x5555555555555555ULL)
+    bits = (bits & 0x3333333333333333ULL) + ((bits >> 2) & 0x3333333333333333ULL)
+    bits = (bits + (bits >> 4)) & 0x0F0F0F0F0F0F0F0FULL
+    return <int>((bits * 0x0101010101010101ULL) >> 56)
+
+cdef inline int _bit_index(uint64_t lsb) nogil:
+    """ 1ビットだけ立った値からそのビットの位置を返す """
+    return _popcount(lsb - 1)
+
+cdef uint64_t _move_mask(uint64_t my, uint64_t opp) nogil:
+    """ 合法手をビットボードで返す（Dumb7Fill） """
+    cdef uint64_t empty = ~(my | opp)
+    cdef uint64_t moves = 0, x
+    cdef int d, i
+    for d in range(8):
+        x = opp & _shift(my, SHIFTS[d], MASKS[d])
+        for i in range(5):
+            x |= opp & _shift(x, SHIFTS[d], MASKS[d])
+        moves |= empty & _shift(x, SHIFTS[d], MASKS[d])
+    return moves
+
+cdef uint64_t _flip_mask(uint64_t my, uint64_t opp, uint64_t move_bit) nogil:
+    """ move_bit に打ったときにひっくり返る石をビットボードで返す """
+    cdef uint64_t flips = 0, t
+    cdef int d, i
+    for d in range(8):
+        t = opp & _shift(move_bit, SHIFTS[d], MASKS[d])
+        for i in range(5):
+            t |= opp & _shift(t, SHIFTS[d], MASKS[d])
+        if my & _shift(t, SHIFTS[d], MASKS[d]):
+            flips |= t
+    return flips
+
+def _rebuild(black, white, current_player, last_move, zhash):
+    """ pickle からの復元用（multiprocessing でワーカーに盤面を渡すため） """
+    cdef OthelloGame game = OthelloGame()
+    game.black = black
+    game.white = white
+    game.current_player = current_player
+    game.last_move = last_move
+    game.zhash = zhash
+    return game
+
+cdef class OthelloGame:
+    cdef public uint64_t black, white  # 64bitのビットボード
+    cdef public int current_player  # 1: 黒, -1: 白
+    cdef public object last_move  # 最後の手
+    cdef public object _cached_moves  # 合法手のキャッシュ（盤面が変わるたびに破棄）
+    cdef public uint64_t zhash  # 局面の Zobrist ハッシュ
+
+    def __init__(self):
+        self.black, self.white = self.initialize_board()
+        self.current_player = 1
+        self.last_move = None
+        self._cached_moves = None
+        self.zhash = self.compute_hash()
+
+    def __reduce__(self):
+        return _rebuild, (self.black, self.white, self.current_player,
+                          self.last_move, self.zhash)
+
+    def initialize_board(self):
+        """ ビットボードで初期盤面を作成 """
+        return 0x0000000810000000, 0x0000001008000000
+
+    @property
+    def board(self):
+        """ 1次元の盤面（表示用）。list ではなく 64 バイトの array('b') で返す """
+        cdef uint64_t bits, lsb
+        board = array('b', bytes(64))
+        bits = self.black
+        while bits:
+            lsb = bits & (~bits + 1)
+            board[_bit_index(lsb)] = 1
+            bits ^= lsb
+        bits = self.white
+        while bits:
+            lsb = bits & (~bits + 1)
+            board[_bit_index(lsb)] = -1
+            bits ^= lsb
+        return board
+
+    cpdef uint64_t compute_hash(self):
+        """ 盤面と手番から Zobrist ハッシュを一から計算する """
+        cdef uint64_t zhash = ZOBRIST_STM if self.current_player == -1 else 0
+        cdef int i
+        for i in range(64):
+            if self.black >> i & 1:
+                zhash ^= ZOBRIST[i][0]
+            elif self.white >> i & 1:
+                zhash ^= ZOBRIST[i][1]
+        return zhash
+
+    cpdef uint64_t gen_moves(self):
+        """ 現在のプレイヤーの合法手をビットボードで返す """
+        if self.current_player == 1:
+            return _move_mask(self.black, self.white)
+        return _move_mask(self.white, self.black)
+
+    cpdef list get_valid_moves(self):
+        """ 現在のプレイヤーの合法手をリストで返す（インデックス形式）
+        結果はキャッシュされるので、呼び出し側で変更しないこと """
+        cdef uint64_t mask, lsb
+        cdef list moves
+        if self._cached_moves is not None:
+            return self._cached_moves
+        mask = self.gen_moves()
+        moves = []
+        while mask:
+            lsb = mask & (~mask + 1)
+            moves.append(_bit_index(lsb))
+            mask ^= lsb
+        self._cached_moves = moves
+        return moves
+
+    def is_valid_move(self, index):
+        """ 指定のインデックスの手が合法かを判定（キャッシュがあればそれを使い、リストは作らない） """
+        if self._cached_moves is not None:
+            return index in self._cached_moves
+        return bool(self.gen_moves() >> index & 1)
+
+    cpdef pass_turn(self):
+        """プレイヤーが手を打てない場合にターンをスキップ（盤面はそのままで手番だけを交代する）"""
+        self.current_player = -self.current_player
+        self._cached_moves = None
+        self.zhash ^= ZOBRIST_STM
+
+    def apply_move(self, move):
+        """ 指定の手を適用し、盤面を更新する """
+        cdef uint64_t my, opp, move_bit, flips, lsb
+        cdef int square
+        if move is None or not self.is_valid_move(move):
+            print(f"Invalid move detected: {move}")  # デバッグ用
+            return
+        square = move
+        move_bit = (<uint64_t>1) << square
+        if self.current_player == 1:
+            my, opp = self.black, self.white
+        else:
+            my, opp = self.white, self.black
+        flips = _flip_mask(my, opp, move_bit)
+        my |= move_bit | flips
+        opp ^= flips
+        if self.current_player == 1:
+            self.black, self.white = my, opp
+        else:
+            self.white, self.black = my, opp
+        self.zhash ^= ZOBRIST[square][0 if self.current_player == 1 else 1] ^ ZOBRIST_STM
+        while flips:
+            lsb = flips & (~flips + 1)
+            self.zhash ^= ZOBRIST_FLIP[_bit_index(lsb)]
+            flips ^= lsb
+        self.last_move = move
+        self.current_player = -self.current_player
+        self._cached_moves = None
+
+    cpdef OthelloGame clone(self):
+        """ 盤面のコピーを作成（MCTSのため） """
+        cdef OthelloGame new_game = OthelloGame.__new__(OthelloGame)
+        new_game.black = self.black
+        new_game.white = self.white
+        new_game.current_player = self.current_player
+        new_game.last_move = None
+        new_game.zhash = self.zhash
+        new_game._cached_moves = self._cached_moves  # 同じ盤面なので合法手も使い回せる
+        return new_game
+
+    cpdef bint has_any_move(self):
+        """ 現在のプレイヤーに打てる手があるか（リストは作らない） """
+        if self._cached_moves is not None:
+            return bool(self._cached_moves)
+        return self.gen_moves() != 0
+
+    cpdef bint opponent_has_any_move(self):
+        """ 相手に打てる手があるか """
+        if self.current_player == 1:
+            return _move_mask(self.white, self.black) != 0
+        return _move_mask(self.black, self.white) != 0
+
+    cpdef bint is_game_over(self):
+        """ ゲームが終了したかを判定（両者とも打てる手がなければ終局） """
+        if (self.black | self.white) == FULL:
+            return True
+        if self.has_any_move():
+            return False
+        return not self.opponent_has_any_move()
+
+    cpdef int get_winner(self):
+        """ 勝者を判定 """
+        cdef int black = _popcount(self.black), white = _popcount(self.white)
+        return 1 if black > white else -1 if white > black else 0
+
+    def print_board(self):
+        edge = 8
+        print("\n  0 1 2 3 4 5 6 7")
+        for i in range(edge):
+            temp = []
+            temp.append(str(int(i)))
+            for el in self.board[edge * i:edge * (i + 1)]:
+                if el == -1:
+                    temp.append("○")
+                elif el == 1:
+                    temp.append("●")
+                else:
+                    temp.append("+")
+            print(" ".join(temp))